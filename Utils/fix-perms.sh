@@ -5,7 +5,7 @@ if [ "$1" ]; then
     chgrp -R www-data $1
     chmod 2770 $1
     cd $1
-    find . -type f -exec chmod 660 {} \;
+    find . -type f -exec chmod 660 {} +
     chmod 2770 include 2>/dev/null
     chmod 2770 extra-files 2>/dev/null
   else
@@ -14,8 +14,8 @@ if [ "$1" ]; then
 else
   chmod -R a-s *
   chgrp -R www-data *
-  find . -type d -exec chmod 2770 {} \;
-  find . -type f -exec chmod 660 {} \;
+  find . -type d -exec chmod 2770 {} +
+  find . -type f -exec chmod 660 {} +
   chmod 750 *.cgi *.sh
   chmod -f 750 clean-sessions.pl
   chmod 640 sqtpm.pm sqtpm.cfg sqtpm.js sqtpm.css moss-sqtpm *.html *.png
@@ -43,278 +43,563 @@ YAML Configuration Format (deploy.yml):
 
 import sys
 import os
+import collections
+import fnmatch
+import hashlib
+import pwd
+import functools
+import select
+import stat
 import subprocess
 import time
 import argparse
 import yaml
 
-def run_command(cmd, check=True, capture_output=False):
-    """Run a shell command"""
-    print(f"Running: {' '.join(cmd) if isinstance(cmd, list) else cmd}")
-    if isinstance(cmd, str):
-        cmd = cmd.split()
-    
+# Use the libyaml-backed C loader/dumper when PyYAML is linked against it;
+# the pure-Python ones are an order of magnitude slower
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# The docker SDK, when installed, talks to the daemon over one persistent
+# socket connection instead of forking the docker CLI per call. It is
+# optional; everything falls back to the CLI without it.
+try:
+    import docker as docker_sdk
+except ImportError:
+    docker_sdk = None
+
+_docker_client = None
+_docker_client_failed = False
+
+def get_docker_client():
+    """Return a shared docker SDK client, or None when the SDK is unavailable"""
+    global _docker_client, _docker_client_failed
+
+    if docker_sdk is None or _docker_client_failed:
+        return None
+
+    if _docker_client is None:
+        try:
+            _docker_client = docker_sdk.from_env()
+        except Exception as e:
+            print(f"Warning: docker SDK unavailable ({e}), falling back to the docker CLI")
+            _docker_client_failed = True
+            return None
+
+    return _docker_client
+
+PathInfo = collections.namedtuple('PathInfo', ['abs_path', 'basename', 'exists', 'is_dir', 'is_file'])
+
+@functools.lru_cache(maxsize=None)
+def path_info(path):
+    """Stat a path once and cache everything the deploy needs to know about it
+
+    Validation, override generation and basename lookups all ask about the
+    same paths; caching the answer keeps that at one stat syscall per path
+    for the whole run. Deployment inputs do not change mid-run, so the
+    cache cannot go stale.
+    """
+    abs_path = os.path.abspath(path)
+    # Strip trailing slash to ensure basename works correctly
+    basename = os.path.basename(path.rstrip('/')) or os.path.basename(abs_path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return PathInfo(abs_path, basename, False, False, False)
+    return PathInfo(abs_path, basename, True,
+                    stat.S_ISDIR(st.st_mode), stat.S_ISREG(st.st_mode))
+
+def run_command(cmd, check=True, capture_output=False, text=True):
+    """Run a command given as an argv list
+
+    Pass text=False when captured output is only checked, not parsed,
+    to skip the per-call decode.
+    """
+    print(f"Running: {' '.join(cmd)}")
+
     result = subprocess.run(
-        cmd, 
-        check=check, 
-        capture_output=capture_output, 
-        text=True
+        cmd,
+        check=check,
+        capture_output=capture_output,
+        text=text
     )
     return result
 
-def wait_for_container(container_name, max_wait=60):
-    """Wait for container to be running and healthy"""
-    print(f"Waiting for container {container_name} to be ready...")
-    
-    for i in range(max_wait):
+def container_is_running(container_name):
+    """Check whether a container is currently running"""
+    client = get_docker_client()
+    if client is not None:
         try:
-            result = run_command(
-                ["docker", "ps", "--filter", f"name={container_name}", "--format", "{{.Status}}"],
-                capture_output=True,
-                check=False
-            )
-            
-            if result.returncode == 0 and "Up" in result.stdout:
+            return client.containers.get(container_name).status == "running"
+        except docker_sdk.errors.NotFound:
+            return False
+        except docker_sdk.errors.APIError as e:
+            print(f"Warning: could not inspect container via SDK: {e}")
+
+    result = run_command(
+        ["docker", "inspect", "-f", "{{.State.Running}}", container_name],
+        capture_output=True,
+        check=False
+    )
+    return result.returncode == 0 and result.stdout.strip() == "true"
+
+def start_container_watch(container_name):
+    """Subscribe to the daemon's start events for a container
+
+    Callers start this before `docker compose up` so the readiness wait
+    overlaps container startup instead of beginning only after compose
+    returns. Returns None when the events subscription cannot be opened.
+    """
+    try:
+        return subprocess.Popen(
+            ["docker", "events",
+             "--filter", f"container={container_name}",
+             "--filter", "event=start",
+             "--format", "{{.Status}}"],
+            stdout=subprocess.PIPE,
+            text=True
+        )
+    except OSError as e:
+        print(f"Warning: could not subscribe to docker events: {e}")
+        return None
+
+def wait_for_container(container_name, max_wait=60, watch=None):
+    """Wait for container to be running and healthy
+
+    Instead of polling `docker ps` once per second, block on the daemon's
+    start event for the container, so readiness is detected as soon as the
+    daemon reports it. An already-started watch (see start_container_watch)
+    can be passed in; otherwise one is opened here. Falls back to polling
+    when the events subscription is unavailable.
+    """
+    print(f"Waiting for container {container_name} to be ready...")
+
+    # Subscribe to start events before checking state, so a start that
+    # happens between the check and the subscription is not missed
+    if watch is None:
+        watch = start_container_watch(container_name)
+
+    if watch is None:
+        # No events stream: poll container state with exponential backoff,
+        # so a fast start is noticed within milliseconds while slow starts
+        # settle into a probe every half second
+        delay = 0.01
+        elapsed = 0.0
+        while elapsed < max_wait:
+            if container_is_running(container_name):
                 print(f"Container {container_name} is running!")
                 return True
-                
-        except Exception as e:
-            print(f"Error checking container status: {e}")
-        
-        time.sleep(1)
-    
+            time.sleep(delay)
+            elapsed += delay
+            delay = min(delay * 2, 0.5)
+        print(f"Container {container_name} did not start within {max_wait} seconds")
+        return False
+
+    try:
+        # Fast path: container already running
+        if container_is_running(container_name):
+            print(f"Container {container_name} is running!")
+            return True
+
+        # Block until the start event arrives or the timeout expires
+        ready, _, _ = select.select([watch.stdout], [], [], max_wait)
+        if ready and watch.stdout.readline():
+            print(f"Container {container_name} is running!")
+            return True
+    except Exception as e:
+        print(f"Error waiting for container start event: {e}")
+    finally:
+        watch.terminate()
+        watch.wait()
+
     print(f"Container {container_name} did not start within {max_wait} seconds")
     return False
 
-def update_docker_compose_override(assignments, config_file=None, pass_files=None):
-    """Update docker-compose.override.yml with volume mappings for assignments, config file, and password files, preserving existing ones"""
-    import yaml
-    import os
-    
+# Parsed override volumes keyed by the file's (mtime_ns, size), so
+# idempotent re-runs skip the read and YAML parse
+_override_cache = None
+
+BUILD_FINGERPRINT_FILE = ".build-fingerprint"
+
+def load_dockerignore_patterns(context_dir="."):
+    """Read .dockerignore patterns, ignoring comments and blank lines"""
+    patterns = []
+    try:
+        with open(os.path.join(context_dir, ".dockerignore")) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    patterns.append(line.rstrip('/'))
+    except OSError:
+        pass
+    return patterns
+
+def build_context_fingerprint(context_dir="."):
+    """Fingerprint the docker build context from file names, mtimes and sizes
+
+    Walks the context the way the builder would (honoring .dockerignore),
+    hashing (relpath, mtime_ns, size) per file. Cheap compared to the
+    context transfer and layer hashing a 'docker compose up --build' pays
+    even on a full cache hit.
+    """
+    patterns = load_dockerignore_patterns(context_dir)
+    patterns.append('.git')
+    # Deploy's own byproducts do not reach the image: the marker would
+    # invalidate the fingerprint it records, and the override file is
+    # rewritten on every volume change without any COPY consuming it
+    patterns.append(BUILD_FINGERPRINT_FILE)
+    patterns.append('docker-compose.override.yml')
+
+    def ignored(rel_path):
+        return any(fnmatch.fnmatch(rel_path, p) or rel_path.startswith(f"{p}/")
+                   for p in patterns)
+
+    digest = hashlib.blake2b()
+    for root, dirs, files in os.walk(context_dir):
+        rel_root = os.path.relpath(root, context_dir)
+        prefix = '' if rel_root == '.' else f"{rel_root}/"
+        dirs[:] = sorted(d for d in dirs if not ignored(f"{prefix}{d}"))
+        for name in sorted(files):
+            rel_path = f"{prefix}{name}"
+            if ignored(rel_path):
+                continue
+            try:
+                st = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            digest.update(f"{rel_path}\0{st.st_mtime_ns}\0{st.st_size}\0".encode())
+
+    return digest.hexdigest()
+
+def read_build_fingerprint():
+    """Read the fingerprint of the last successfully built context"""
+    try:
+        with open(BUILD_FINGERPRINT_FILE) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def write_build_fingerprint(fingerprint):
+    """Record the fingerprint of the context that was just built"""
+    try:
+        with open(BUILD_FINGERPRINT_FILE, "w") as f:
+            f.write(fingerprint + "\n")
+    except OSError as e:
+        print(f"Warning: could not write {BUILD_FINGERPRINT_FILE}: {e}")
+
+def bind_mount_suffix():
+    """Consistency modifier appended to assignment bind mounts
+
+    On macOS and Windows hosts ':delegated' lets the container's view lag
+    the host slightly, which makes file I/O on bind mounts considerably
+    faster there. Linux bind mounts are native, so no modifier is added
+    and the override file keeps its usual shape.
+    """
+    if sys.platform in ('darwin', 'win32', 'cygwin'):
+        return ':delegated'
+    return ''
+
+def read_override_volumes():
+    """Read the volume list from docker-compose.override.yml, with caching"""
+    global _override_cache
+
+    default_volumes = ['./data:/var/www/data']  # Keep existing data volume
+    try:
+        st = os.stat("docker-compose.override.yml")
+    except OSError:
+        return default_volumes
+
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _override_cache and _override_cache[0] == stamp:
+        return list(_override_cache[1])
+
+    volumes = default_volumes
+    try:
+        with open("docker-compose.override.yml", "r") as f:
+            existing_config = yaml.load(f, Loader=YamlLoader)
+            if existing_config and 'services' in existing_config and 'sqtpm-web' in existing_config['services'] and 'volumes' in existing_config['services']['sqtpm-web']:
+                volumes = existing_config['services']['sqtpm-web']['volumes']
+    except Exception as e:
+        print(f"Warning: Could not read existing override file: {e}")
+
+    _override_cache = (stamp, list(volumes))
+    return volumes
+
+def update_docker_compose_override(assignments, config_file=None, pass_files=None,
+                                   internal_volumes=None):
+    """Update docker-compose.override.yml with volume mappings for assignments, config file, and password files, preserving existing ones
+
+    internal_volumes is an optional list of sub-paths (relative to each
+    assignment) to shadow with anonymous volumes so write-heavy files stay
+    in the container's overlay instead of round-tripping to the host.
+
+    Returns (success, changed) where changed tells whether any volume
+    mapping was added, replaced or removed, so the caller can skip
+    restarting a container whose mounts are already current.
+    """
     # Read existing override file if it exists
-    existing_volumes = ['./data:/var/www/data']  # Keep existing data volume
-    if os.path.exists("docker-compose.override.yml"):
-        try:
-            with open("docker-compose.override.yml", "r") as f:
-                existing_config = yaml.safe_load(f)
-                if existing_config and 'services' in existing_config and 'sqtpm-web' in existing_config['services'] and 'volumes' in existing_config['services']['sqtpm-web']:
-                    existing_volumes = existing_config['services']['sqtpm-web']['volumes']
-        except Exception as e:
-            print(f"Warning: Could not read existing override file: {e}")
-    
+    existing_volumes = read_override_volumes()
+
+    # Index existing volumes by their container-side mount path so each
+    # membership check below is a dict lookup instead of a substring scan
+    # over the whole volume list
+    mounted = {}
+    for existing_volume in existing_volumes:
+        parts = existing_volume.split(':')
+        # Anonymous volumes are a bare container path with no host side
+        mounted[parts[1] if len(parts) >= 2 else parts[0]] = existing_volume
+
+    # Resolve every path once up front; the loops below only consume the
+    # precomputed (abs_path, basename) pairs
+    assignment_infos = [path_info(a) for a in assignments]
+    pass_file_infos = [(p, path_info(p)) for p in pass_files] if pass_files else []
+    config_info = path_info(config_file) if config_file else None
+
     # Get absolute paths for new assignments and use basename for container mapping
+    mount_suffix = bind_mount_suffix()
     new_assignment_volumes = []
-    for assignment in assignments:
-        if os.path.exists(assignment) and os.path.isdir(assignment):
-            abs_path = os.path.abspath(assignment)
-            # Strip trailing slash to ensure basename works correctly
-            assignment_basename = os.path.basename(assignment.rstrip('/'))
-            if not assignment_basename:  # Handle edge case
-                assignment_basename = os.path.basename(abs_path)
-            volume_mapping = f"{abs_path}:/var/www/html/{assignment_basename}"
-            
+    for info in assignment_infos:
+        if info.is_dir:
             # Check if this assignment is already mounted
-            already_exists = False
-            for existing_volume in existing_volumes:
-                if f":/var/www/html/{assignment_basename}" in existing_volume:
-                    print(f"Assignment '{assignment_basename}' already mounted, skipping")
-                    already_exists = True
-                    break
-            
-            if not already_exists:
-                new_assignment_volumes.append(volume_mapping)
-    
+            if f"/var/www/html/{info.basename}" in mounted:
+                print(f"Assignment '{info.basename}' already mounted, skipping")
+                continue
+
+            new_assignment_volumes.append(
+                f"{info.abs_path}:/var/www/html/{info.basename}{mount_suffix}")
+
+    # Shadow write-heavy sub-paths of each assignment with anonymous
+    # volumes so their writes stay in the container's overlay layer
+    new_internal_volumes = []
+    if internal_volumes:
+        for info in assignment_infos:
+            if info.is_dir:
+                for sub_path in internal_volumes:
+                    container_path = f"/var/www/html/{info.basename}/{sub_path.strip('/')}"
+                    if container_path in mounted:
+                        continue
+                    new_internal_volumes.append(container_path)
+                    print(f"Adding internal volume: {container_path}")
+
     # Add password file mappings
     new_pass_file_volumes = []
-    if pass_files:
-        for pass_file in pass_files:
-            if os.path.exists(pass_file) and os.path.isfile(pass_file):
-                abs_pass_path = os.path.abspath(pass_file)
-                pass_file_basename = os.path.basename(pass_file)
-                pass_volume_mapping = f"{abs_pass_path}:/var/www/html/{pass_file_basename}"
-                
-                # Check if this password file is already mounted
-                pass_already_exists = False
-                for existing_volume in existing_volumes:
-                    if f":/var/www/html/{pass_file_basename}" in existing_volume:
-                        print(f"Password file '{pass_file_basename}' already mounted, skipping")
-                        pass_already_exists = True
-                        break
-                
-                if not pass_already_exists:
-                    new_pass_file_volumes.append(pass_volume_mapping)
-                    print(f"Adding password file mapping: {pass_file} -> {pass_file_basename}")
-    
+    for pass_file, info in pass_file_infos:
+        if info.is_file:
+            # Check if this password file is already mounted
+            if f"/var/www/html/{info.basename}" in mounted:
+                print(f"Password file '{info.basename}' already mounted, skipping")
+                continue
+
+            new_pass_file_volumes.append(f"{info.abs_path}:/var/www/html/{info.basename}")
+            print(f"Adding password file mapping: {pass_file} -> {info.basename}")
+
     # Add config file mapping if provided
     new_config_volumes = []
-    if config_file and os.path.exists(config_file) and os.path.isfile(config_file):
-        abs_config_path = os.path.abspath(config_file)
-        config_volume_mapping = f"{abs_config_path}:/var/www/html/sqtpm.cfg"
-        
-        # Check if config file is already mounted
-        config_already_exists = False
-        for existing_volume in existing_volumes:
-            if ":/var/www/html/sqtpm.cfg" in existing_volume:
+    config_replaced = False
+    if config_info and config_info.is_file:
+        config_volume_mapping = f"{config_info.abs_path}:/var/www/html/sqtpm.cfg"
+        existing_config_volume = mounted.get("/var/www/html/sqtpm.cfg")
+
+        if existing_config_volume == config_volume_mapping:
+            # Same file already mounted: leave it alone so an unchanged
+            # deploy stays on the fast path
+            print(f"Config file '{config_file}' already mounted, skipping")
+        else:
+            # Replace any different existing config mapping
+            if existing_config_volume is not None:
                 print(f"Config file already mounted, updating with: {config_file} -> sqtpm.cfg")
-                # Replace existing config mapping
-                existing_volumes = [v for v in existing_volumes if ":/var/www/html/sqtpm.cfg" not in v]
-                config_already_exists = False  # Allow replacement
-                break
-        
-        if not config_already_exists:
+                existing_volumes.remove(existing_config_volume)
+                config_replaced = True
+
             new_config_volumes.append(config_volume_mapping)
             print(f"Adding config file mapping: {config_file} -> sqtpm.cfg")
     elif config_file:
         print(f"Warning: Config file '{config_file}' does not exist or is not a file")
     
     # Combine existing and new volumes
-    all_volumes = existing_volumes + new_assignment_volumes + new_pass_file_volumes + new_config_volumes
-    
+    all_volumes = (existing_volumes + new_assignment_volumes + new_internal_volumes
+                   + new_pass_file_volumes + new_config_volumes)
+    changed = bool(new_assignment_volumes or new_internal_volumes or new_pass_file_volumes
+                   or new_config_volumes or config_replaced)
+
+    # Nothing added, replaced or removed: the file on disk is already
+    # exactly what we would write, so skip the dump
+    if not changed and len(all_volumes) > 1:
+        total_count = len(all_volumes) - 1  # Subtract data volume
+        print(f"docker-compose.override.yml already up to date with {total_count} volume(s)")
+        return True, False
+
     if len(all_volumes) <= 1:  # Only data volume
         # Remove override file if no volumes needed
         if os.path.exists("docker-compose.override.yml"):
             os.remove("docker-compose.override.yml")
             print("Removed docker-compose.override.yml (no additional volumes needed)")
-        return True
-    
-    override_config = {
-        'services': {
-            'sqtpm-web': {
-                'volumes': all_volumes
-            }
-        }
-    }
-    
+            changed = True
+        return True, changed
+
     try:
+        # The override schema is fixed (one service, one volume list), so
+        # emit it directly instead of walking a dict through the YAML
+        # emitter; the output matches what yaml.dump produced
         with open("docker-compose.override.yml", "w") as f:
-            yaml.dump(override_config, f, default_flow_style=False)
+            f.write("services:\n  sqtpm-web:\n    volumes:\n")
+            f.writelines(f"    - {volume}\n" for volume in all_volumes)
+
+        # Remember what we just wrote so a later call in the same run can
+        # skip re-parsing it
+        global _override_cache
+        st = os.stat("docker-compose.override.yml")
+        _override_cache = ((st.st_mtime_ns, st.st_size), list(all_volumes))
+
         new_assignment_count = len(new_assignment_volumes)
         new_pass_count = len(new_pass_file_volumes)
         new_config_count = len(new_config_volumes)
         total_count = len(all_volumes) - 1  # Subtract data volume
         print(f"Updated docker-compose.override.yml: added {new_assignment_count} assignment(s), {new_pass_count} password file(s), {new_config_count} config mapping(s). Total: {total_count} volume(s)")
-        return True
+        return True, changed
     except Exception as e:
         print(f"Error updating docker-compose.override.yml: {e}")
-        return False
+        return False, changed
 
 def get_assignment_basenames(assignments):
     """Get basenames of assignment directories for use in container paths"""
-    basenames = []
-    for assignment in assignments:
-        basename = os.path.basename(assignment.rstrip('/'))  # Remove trailing slash if any
-        if not basename:  # Handle edge case where assignment might be empty or just '/'
-            basename = os.path.basename(os.path.abspath(assignment))
-        basenames.append(basename)
-    return basenames
+    return [path_info(assignment).basename for assignment in assignments]
 
 def validate_assignments(assignments):
     """Validate that assignment directories exist"""
     valid_assignments = []
+    seen = set()
     for assignment in assignments:
-        if not os.path.exists(assignment):
+        info = path_info(assignment)
+        # The same directory may be referenced under several spellings;
+        # validate (and mount) it once
+        if info.abs_path in seen:
+            continue
+        seen.add(info.abs_path)
+
+        if not info.exists:
             print(f"Warning: Assignment directory '{assignment}' does not exist")
             continue
-            
-        if not os.path.isdir(assignment):
+
+        if not info.is_dir:
             print(f"Warning: '{assignment}' is not a directory")
             continue
-        
+
         valid_assignments.append(assignment)
         print(f"Validated assignment directory: {assignment}")
     
     return valid_assignments
 
-def create_pass_file_links(assignment_pass_pairs, container_name="sqtpm-sqtpm-web-1"):
-    """Create symbolic links to password files in their associated assignment directories"""
-    if not assignment_pass_pairs:
-        print("No assignment-password pairs specified, skipping symbolic link creation")
-        return True
-    
-    server_root = "/var/www/html"
-    
-    print(f"Creating symbolic links for assignment-password pairs...")
-    
+def create_pass_file_links(assignment_pass_pairs):
+    """Create password file symlinks directly in the host assignment directories
+
+    Assignment directories are bind mounts, so a link written on the host
+    appears inside the container at the same place without any docker
+    exec. The relative target ../<name> resolves against the server root
+    inside the container, where the password file is mounted; on the host
+    the link may look dangling, which is expected.
+
+    Returns False when any link could not be created.
+    """
+    success = True
+
     for assignments, pass_files in assignment_pass_pairs:
         if not pass_files:
             print(f"No password files for assignments {assignments}, skipping")
             continue
-            
+
         print(f"Processing assignments {assignments} with password files {pass_files}")
-        
-        # Get basenames of assignments for container paths
-        assignment_basenames = get_assignment_basenames(assignments)
-        
-        for assignment, assignment_basename in zip(assignments, assignment_basenames):
-            if not assignment_basename or assignment_basename in ['.', '..']:
-                print(f"Warning: Invalid basename '{assignment_basename}' for assignment '{assignment}', skipping")
-                continue
-                
-            assignment_path = f"{server_root}/{assignment_basename}"
-            
-            # Check if assignment directory exists in container (mounted as volume)
-            try:
-                result = run_command([
-                    "docker", "exec", container_name,
-                    "test", "-d", assignment_path
-                ], check=False, capture_output=True)
-                
-                if result.returncode != 0:
-                    print(f"Warning: Assignment directory {assignment_basename} not found in container")
-                    continue
-                    
-            except subprocess.CalledProcessError:
-                print(f"Warning: Could not check assignment directory {assignment_basename}")
+
+        pass_file_basenames = [os.path.basename(p) for p in pass_files]
+
+        for assignment in assignments:
+            info = path_info(assignment)
+            if not info.basename or info.basename in ['.', '..']:
+                print(f"Warning: Invalid basename '{info.basename}' for assignment '{assignment}', skipping")
                 continue
-            
-            print(f"Creating password file links in {assignment_basename}...")
-            
-            for pass_file in pass_files:
-                # Extract just the filename from the pass file path
-                pass_file_basename = os.path.basename(pass_file)
-                
-                # Password file should be mounted directly in server root
-                pass_file_path = f"{server_root}/{pass_file_basename}"
-                
-                try:
-                    result = run_command([
-                        "docker", "exec", container_name,
-                        "test", "-f", pass_file_path
-                    ], check=False, capture_output=True)
-                    
-                    if result.returncode != 0:
-                        print(f"Warning: Password file {pass_file_basename} not found in server root (not mounted?)")
-                        continue
-                        
-                except subprocess.CalledProcessError:
-                    print(f"Warning: Could not check password file {pass_file_basename}")
-                    continue
-                
-                # Create symbolic link using just the basename
+
+            for pass_file_basename in pass_file_basenames:
                 link_target = f"../{pass_file_basename}"
-                link_path = f"{assignment_path}/{pass_file_basename}"
-                
+                link_path = os.path.join(info.abs_path, pass_file_basename)
+                link_name = f"{info.basename}/{pass_file_basename} -> {link_target}"
                 try:
-                    # Remove existing link/file if it exists
-                    run_command([
-                        "docker", "exec", container_name,
-                        "rm", "-f", link_path
-                    ], check=False)
-                    
-                    # Create the symbolic link
-                    run_command([
-                        "docker", "exec", container_name,
-                        "ln", "-s", link_target, link_path
-                    ])
-                    
-                    print(f"  Created link: {assignment_basename}/{pass_file_basename} -> {link_target}")
-                    
-                except subprocess.CalledProcessError as e:
-                    print(f"  Error creating link for {pass_file_basename} in {assignment_basename}: {e}")
-                    return False
-    
+                    # Remove-then-symlink replaces stale links; a missing
+                    # old link is the common case, not an error
+                    try:
+                        os.remove(link_path)
+                    except FileNotFoundError:
+                        pass
+                    os.symlink(link_target, link_path)
+                    print(f"  Created link: {link_name}")
+                except OSError as e:
+                    print(f"  Error: could not create link {link_name}: {e}")
+                    success = False
+
+    return success
+
+def run_container_setup(commands, container_name="sqtpm-sqtpm-web-1"):
+    """Run all container-side deploy commands as a single docker exec
+
+    Joins the given shell commands into one script so permission fixing
+    and the Apache reload cost one container exec instead of one each.
+    Output echoed by the script is reported back to the user.
+    """
+    if not commands:
+        return True
+
+    script = "set -e\n" + "\n".join(commands)
+
+    client = get_docker_client()
+    if client is not None:
+        try:
+            exit_code, output = client.containers.get(container_name).exec_run(
+                ["/bin/sh", "-c", script])
+            stdout, stderr = output.decode(), ""
+        except docker_sdk.errors.DockerException as e:
+            print(f"Error during container setup: {e}")
+            return False
+    else:
+        result = run_command([
+            "docker", "exec", container_name, "/bin/sh", "-c", script
+        ], check=False, capture_output=True)
+        exit_code, stdout, stderr = result.returncode, result.stdout, result.stderr
+
+    for line in stdout.splitlines():
+        if line:
+            print(f"  {line}")
+
+    if exit_code != 0:
+        print(f"Error during container setup: {stderr.strip()}")
+        return False
+
     return True
 
+def reload_apache(container_name="sqtpm-sqtpm-web-1"):
+    """Gracefully reload Apache by signalling the container's PID 1
+
+    start-sqtpm.sh execs apache2ctl in the foreground, so Apache is the
+    container's PID 1 and the reload signal can be delivered through the
+    daemon without opening an exec session. SIGUSR1 is what apache2ctl
+    graceful sends; the exec-based reload remains as fallback in case
+    the process model ever changes.
+    """
+    client = get_docker_client()
+    if client is not None:
+        try:
+            client.containers.get(container_name).kill(signal="SIGUSR1")
+            print("Apache reloaded")
+            return True
+        except docker_sdk.errors.DockerException as e:
+            print(f"Warning: could not signal Apache through the docker SDK: {e}")
+    else:
+        result = run_command(["docker", "kill", "--signal=SIGUSR1", container_name],
+                             check=False, capture_output=True)
+        if result.returncode == 0:
+            print("Apache reloaded")
+            return True
+
+    return run_container_setup(["apache2ctl graceful || true"], container_name)
+
 def parse_assignment_pass_pairs(args_list):
     """Parse command line arguments to extract assignment-password file pairs
     
@@ -322,24 +607,20 @@ def parse_assignment_pass_pairs(args_list):
     Returns: [(assignments_list, pass_files_list), ...]
     """
     pairs = []
-    
+
     for arg in args_list:
-        if ':' in arg:
-            # Split by ':' to separate assignments from password files
-            assignments_part, pass_files_part = arg.split(':', 1)
-            
-            # Split assignments by comma
-            assignments = [a.strip() for a in assignments_part.split(',') if a.strip()]
-            
-            # Split password files by comma
-            pass_files = [p.strip() for p in pass_files_part.split(',') if p.strip()]
-            
-            pairs.append((assignments, pass_files))
-        else:
-            # Assignment without password files
-            assignments = [a.strip() for a in arg.split(',') if a.strip()]
-            pairs.append((assignments, []))
-    
+        # partition separates assignments from password files without the
+        # separate membership test split() would need
+        assignments_part, sep, pass_files_part = arg.partition(':')
+
+        # Split assignments by comma
+        assignments = list(filter(None, map(str.strip, assignments_part.split(','))))
+
+        # Split password files by comma; empty when no ':' was present
+        pass_files = list(filter(None, map(str.strip, pass_files_part.split(',')))) if sep else []
+
+        pairs.append((assignments, pass_files))
+
     return pairs
 
 def get_all_assignments_from_pairs(assignment_pass_pairs):
@@ -347,14 +628,14 @@ def get_all_assignments_from_pairs(assignment_pass_pairs):
     all_assignments = set()
     for assignments, _ in assignment_pass_pairs:
         all_assignments.update(assignments)
-    return list(all_assignments)
+    return frozenset(all_assignments)
 
 def get_all_pass_files_from_pairs(assignment_pass_pairs):
     """Extract all unique password files from assignment-password pairs"""
     all_pass_files = set()
     for _, pass_files in assignment_pass_pairs:
         all_pass_files.update(pass_files)
-    return list(all_pass_files)
+    return frozenset(all_pass_files)
 
 def validate_pass_files(pass_files):
     """Validate that password files exist"""
@@ -362,15 +643,23 @@ def validate_pass_files(pass_files):
         return []
     
     valid_pass_files = []
+    seen = set()
     for pass_file in pass_files:
-        if not os.path.exists(pass_file):
+        info = path_info(pass_file)
+        # The same password file is commonly shared between assignments;
+        # validate it once
+        if info.abs_path in seen:
+            continue
+        seen.add(info.abs_path)
+
+        if not info.exists:
             print(f"Warning: Password file '{pass_file}' does not exist locally")
             continue
-            
-        if not os.path.isfile(pass_file):
+
+        if not info.is_file:
             print(f"Warning: '{pass_file}' is not a file")
             continue
-        
+
         valid_pass_files.append(pass_file)
         print(f"Validated password file: {pass_file}")
     
@@ -396,25 +685,30 @@ def validate_assignment_pass_pairs(assignment_pass_pairs):
 
 def list_pass_files_in_directory(directory="."):
     """List available .pass files in the specified directory"""
-    pass_files = []
+    # scandir carries file-type info from the directory read, avoiding a
+    # separate stat per entry
     try:
-        for file in os.listdir(directory):
-            if file.endswith('.pass') and os.path.isfile(os.path.join(directory, file)):
-                pass_files.append(file)
+        with os.scandir(directory) as it:
+            return [e.name for e in it
+                    if e.name.endswith('.pass') and e.is_file(follow_symlinks=False)]
     except OSError:
-        pass
-    return pass_files
+        return []
 
 def load_deploy_config(yaml_file="deploy.yml"):
-    """Load deployment configuration from YAML file"""
-    import yaml
-    
-    if not os.path.exists(yaml_file):
+    """Load deployment configuration from YAML file
+
+    Returns None when the file is missing, empty or unreadable. A missing
+    file is detected from the open itself rather than a separate exists
+    probe, so the lookup costs one syscall and cannot race with the open.
+    """
+    try:
+        f = open(yaml_file, 'r')
+    except FileNotFoundError:
         return None
-    
+
     try:
-        with open(yaml_file, 'r') as f:
-            config = yaml.safe_load(f)
+        with f:
+            config = yaml.load(f, Loader=YamlLoader)
             return config if config else None
     except Exception as e:
         print(f"Error reading YAML config file '{yaml_file}': {e}")
@@ -500,35 +794,18 @@ assignments:
         f.write(example_config)
     print("Created example deploy.yml file")
 
-def fix_permissions_in_container(container_name="sqtpm-sqtpm-web-1", host_user=None):
-    """Run fix-perms.sh script inside the container and ensure proper ownership"""
-    print("Fixing permissions and ownership in container...")
-    
+def build_fix_permissions_command(host_user=None):
+    """Shell command ensuring proper ownership and permissions under the server root"""
     # Get host user info if not provided
     if not host_user:
-        import pwd
         user_info = pwd.getpwuid(os.getuid())
         host_user = user_info.pw_name
-    
-    try:
-        # First ensure all files are owned by the host user
-        run_command([
-            "docker", "exec", container_name,
-            "/bin/sh", "-c",
-            f"chown -R {host_user}:www-data /var/www/html/"
-        ])
-        
-        # Then run the fix-perms script as the host user
-        run_command([
-            "docker", "exec", container_name,
-            "/bin/sh", "-c",
-            f"su -s /bin/sh {host_user} -c 'cd /var/www/html && chmod +x Utils/fix-perms.sh && sh Utils/fix-perms.sh'"
-        ])
-        print("Permissions and ownership fixed successfully")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"Error fixing permissions: {e}")
-        return False
+
+    # Ensure all files are owned by the host user, then run the fix-perms
+    # script as that user
+    return (f"chown -R {host_user}:www-data /var/www/html/ && "
+            f"su -s /bin/sh {host_user} -c 'cd /var/www/html && sh Utils/fix-perms.sh' && "
+            f"echo 'Permissions and ownership fixed successfully'")
 
 def main():
     parser = argparse.ArgumentParser(
@@ -585,6 +862,20 @@ YAML Configuration (deploy.yml):
         help='Container name (default: sqtpm-sqtpm-web-1)'
     )
     
+    parser.add_argument(
+        '--internal-volumes',
+        nargs='+',
+        metavar='SUBPATH',
+        help='Sub-paths of each assignment (e.g. tmp .cache) to shadow with anonymous volumes so their writes stay inside the container'
+    )
+
+    parser.add_argument(
+        '--max-wait',
+        type=int,
+        default=60,
+        help='Maximum seconds to wait for the container to start (default: 60)'
+    )
+
     parser.add_argument(
         '--build-only',
         action='store_true',
@@ -623,6 +914,7 @@ YAML Configuration (deploy.yml):
         return
     
     # List available pass files if requested
+    yaml_config = None
     if args.list_pass_files:
         available_pass_files = list_pass_files_in_directory()
         if available_pass_files:
@@ -633,8 +925,10 @@ YAML Configuration (deploy.yml):
             print("No .pass files found in current directory")
         print()
         if not args.assignment_pairs:
-            # Check if deploy.yml exists
-            if not os.path.exists(args.yaml_file):
+            # Load the config here instead of just probing for it; the
+            # parsed result is reused below so the file is read once
+            yaml_config = load_deploy_config(args.yaml_file)
+            if yaml_config is None:
                 return
     
     print("SQTPM Deployment Script")
@@ -655,8 +949,9 @@ YAML Configuration (deploy.yml):
     else:
         # Try to load from YAML file
         print(f"Loading configuration from {args.yaml_file}")
-        yaml_config = load_deploy_config(args.yaml_file)
-        
+        if yaml_config is None:
+            yaml_config = load_deploy_config(args.yaml_file)
+
         if yaml_config is None:
             print(f"No configuration found. Either provide command line arguments or create {args.yaml_file}")
             print("Use --create-example-config to create an example configuration file")
@@ -688,12 +983,18 @@ YAML Configuration (deploy.yml):
             print(f"  Assignments: {', '.join(assignments)} (no password files)")
     
     # Get host user information (needed for both building and fixing permissions)
-    import pwd
     user_info = pwd.getpwuid(os.getuid())
     host_uid = user_info.pw_uid
     host_gid = user_info.pw_gid
     host_user = user_info.pw_name
-    
+
+    # Environment for every docker compose invocation below
+    env = os.environ | {
+        'HOST_UID': str(host_uid),
+        'HOST_GID': str(host_gid),
+        'HOST_USER': host_user
+    }
+
     if config_file_override:
         print(f"Config file to mount: {config_file_override}")
     else:
@@ -721,15 +1022,7 @@ YAML Configuration (deploy.yml):
     if build_only_override:
         print("\nBuild-only mode: Building docker image...")
         print(f"Building with host user: {host_user} (UID:{host_uid}, GID:{host_gid})")
-        
-        # Set environment variables for docker compose build
-        env = os.environ.copy()
-        env.update({
-            'HOST_UID': str(host_uid),
-            'HOST_GID': str(host_gid),
-            'HOST_USER': host_user
-        })
-        
+
         try:
             result = subprocess.run(
                 ["docker", "compose", "build"],
@@ -756,76 +1049,106 @@ YAML Configuration (deploy.yml):
     
     # Step 1: Update docker-compose.override.yml with volume mappings for assignments, password files, and config
     print("\nStep 1: Updating volume mappings for assignments, password files, and config...")
-    if not update_docker_compose_override(all_assignments, config_file_override, all_pass_files):
+    updated, volumes_changed = update_docker_compose_override(
+        all_assignments, config_file_override, all_pass_files,
+        internal_volumes=args.internal_volumes)
+    if not updated:
         print("Failed to update docker-compose override")
         sys.exit(1)
-    
+
     # Step 2: Start the container
     print("\nStep 2: Starting SQTPM container with volume mappings...")
-    
-    print(f"Building with host user: {host_user} (UID:{host_uid}, GID:{host_gid})")
-    
-    # Set environment variables for docker compose
-    env = os.environ.copy()
-    env.update({
-        'HOST_UID': str(host_uid),
-        'HOST_GID': str(host_gid),
-        'HOST_USER': host_user
-    })
-    
-    try:
+
+    compose_proc = None
+    watch = None
+    new_fingerprint = None
+
+    # The image bakes in the served content, so the build context decides
+    # both whether a warm container can be reused and whether compose
+    # needs --build; compute the fingerprint once for both
+    context_unchanged = True
+    if not no_rebuild_override:
+        fingerprint = build_context_fingerprint()
+        context_unchanged = fingerprint == read_build_fingerprint()
+
+    # Reuse a warm container: when neither the volume set nor the build
+    # context changed and the container is already up, there is nothing
+    # for docker compose to do
+    if not volumes_changed and context_unchanged and container_is_running(container_override):
+        print(f"Container {container_override} is already running with the current volume mappings and image, reusing it")
+    else:
+        print(f"Building with host user: {host_user} (UID:{host_uid}, GID:{host_gid})")
+
+        # Open the start-event subscription before compose runs so the
+        # readiness wait below overlaps container startup
+        watch = start_container_watch(container_override)
+
         if no_rebuild_override:
             # Start without rebuilding (assumes image exists)
-            result = subprocess.run(
-                ["docker", "compose", "up", "-d"],
-                check=True,
-                env=env
-            )
-            print("Container started successfully (without rebuilding)")
+            compose_command = ["docker", "compose", "up", "-d"]
+            success_message = "Container started successfully (without rebuilding)"
+        elif context_unchanged:
+            # The Dockerfile and its context are untouched since the last
+            # successful build, so skip the rebuild
+            print("Build context unchanged since last build, skipping rebuild")
+            compose_command = ["docker", "compose", "up", "-d"]
+            success_message = "Container started successfully (image up to date)"
         else:
-            # Build and start
-            result = subprocess.run(
-                ["docker", "compose", "up", "-d", "--build"],
-                check=True,
-                env=env
-            )
-            print("Container built and started successfully")
-    except subprocess.CalledProcessError as e:
-        print(f"Error starting container: {e}")
-        sys.exit(1)
-    
-    # Wait for container to be ready
-    if not wait_for_container(container_override):
-        print("Container failed to start properly")
-        sys.exit(1)
-    
-    # Step 3: Create password file symbolic links based on assignment-password pairs
+            compose_command = ["docker", "compose", "up", "-d", "--build"]
+            success_message = "Container built and started successfully"
+            new_fingerprint = fingerprint
+
+        # Launch compose without blocking: the container-side setup script
+        # below only depends on host state, so it is built while compose
+        # (and a possible image build) runs
+        try:
+            compose_proc = subprocess.Popen(compose_command, env=env)
+        except OSError as e:
+            print(f"Error starting container: {e}")
+            if watch is not None:
+                watch.terminate()
+            sys.exit(1)
+
+    # Step 3 preparation, overlapped with docker compose up: the links live
+    # in bind-mounted assignment directories, so they are plain host
+    # syscalls and need neither a running container nor a docker exec
     if any(pass_files for _, pass_files in valid_assignment_pass_pairs):
-        print(f"\nStep 3: Creating password file symbolic links...")
-        if not create_pass_file_links(valid_assignment_pass_pairs, container_override):
+        if not create_pass_file_links(valid_assignment_pass_pairs):
             print("Failed to create password file links")
+            if watch is not None:
+                watch.terminate()
             sys.exit(1)
     else:
-        print("\nStep 3: No password file links to create")
-    
-    # Step 4: Fix permissions and ownership
-    print("\nStep 4: Fixing permissions and ownership...")
-    if not fix_permissions_in_container(container_override, host_user):
-        print("Failed to fix permissions")
+        print("No password file links to create")
+
+    setup_commands = [build_fix_permissions_command(host_user)]
+
+    if compose_proc is not None:
+        if compose_proc.wait() != 0:
+            print(f"Error starting container: docker compose exited with code {compose_proc.returncode}")
+            if watch is not None:
+                watch.terminate()
+            sys.exit(1)
+        if new_fingerprint is not None:
+            write_build_fingerprint(new_fingerprint)
+        print(success_message)
+
+        # Wait for container to be ready
+        if not wait_for_container(container_override, max_wait=args.max_wait, watch=watch):
+            print("Container failed to start properly")
+            sys.exit(1)
+
+    # Step 3: Fix permissions in the container, then reload Apache with a
+    # signal to PID 1 so the new links and mounts are picked up
+    print("\nStep 3: Fixing permissions and reloading Apache...")
+
+    if not run_container_setup(setup_commands, container_override):
+        print("Failed to set up container")
         sys.exit(1)
-    
-    # Step 5: Restart Apache to ensure all changes are loaded
-    print("\nStep 5: Restarting Apache server...")
-    try:
-        run_command([
-            "docker", "exec", container_override,
-            "/bin/sh", "-c",
-            "apache2ctl graceful || true"
-        ], check=False)
-        print("Apache server reloaded successfully")
-    except subprocess.CalledProcessError as e:
-        print(f"Warning: Could not reload Apache: {e}")
-    
+
+    if not reload_apache(container_override):
+        print("Warning: Apache reload failed")
+
     print("\n" + "=" * 40)
     print("Deployment completed successfully!")
     print(f"SQTPM is available at: http://localhost:8080")